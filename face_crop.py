@@ -1,58 +1,125 @@
-"""face_crop.py – find_face_square(image, side_max, pad_px=80)
+"""face_crop.py – find_face_square(rgb, side_max, pad_px=80)
 
 Returns (x0, y0, x1, y1) in ORIGINAL pixels, expanded outward by
 `pad_px` on every side so the crop isn’t tight on the face.
 If no face is detected, returns None.
+
+Detector backend: env FACE_BACKEND = "mediapipe" (default) or "yunet"
+(OpenCV FaceDetectorYN; needs the ONNX model at $YUNET_MODEL).
 """
 from __future__ import annotations
+import atexit
+import os
+import threading
+from pathlib import Path
 from typing import Tuple
 
 import cv2
 import numpy as np
-import mediapipe as mp
-from PIL import Image
 
-_mp_fd = mp.solutions.face_detection
+YUNET_MODEL = Path(
+    os.environ.get(
+        "YUNET_MODEL",
+        Path(__file__).with_name("face_detection_yunet_2023mar.onnx"),
+    )
+)
+BACKENDS = ("mediapipe", "yunet")
+BACKEND = (os.environ.get("FACE_BACKEND") or "mediapipe").strip().lower()
+if BACKEND not in BACKENDS:
+    raise ValueError(
+        f"FACE_BACKEND={BACKEND!r} is not supported; use one of {', '.join(BACKENDS)}"
+    )
+DETECT_W, DETECT_H = 640, 480  # fixed, letterboxed detector input → no shape re-dispatch
+
+_fd = None  # detector, built once and kept for the app's lifetime
+_fd_lock = threading.Lock()  # one graph, callers may be on worker threads
+
+
+def _get_fd():
+    global _fd
+    if _fd is None:
+        if BACKEND == "yunet":
+            if not YUNET_MODEL.is_file():
+                raise FileNotFoundError(
+                    f"FACE_BACKEND=yunet but the YuNet model is missing: {YUNET_MODEL} "
+                    "(download face_detection_yunet_2023mar.onnx or set YUNET_MODEL)"
+                )
+            _fd = cv2.FaceDetectorYN.create(str(YUNET_MODEL), "", (0, 0))
+        else:
+            import mediapipe as mp
+            _fd = mp.solutions.face_detection.FaceDetection(
+                model_selection=1, min_detection_confidence=0.4
+            )
+            atexit.register(_fd.close)
+    return _fd
+
+
+def _largest_face(rgb: np.ndarray) -> Tuple[float, float, float, float] | None:
+    """(xmin, ymin, width, height) of the largest face, relative to `rgb`."""
+    h, w = rgb.shape[:2]
+    fd = _get_fd()
+    if BACKEND == "yunet":
+        fd.setInputSize((w, h))
+        _, faces = fd.detect(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+        if faces is None:
+            return None
+        x, y, bw, bh = faces[np.argmax(faces[:, 2] * faces[:, 3]), :4]
+        return x / w, y / h, bw / w, bh / h
+
+    res = fd.process(rgb)
+    if not res.detections:
+        return None
+    det = max(
+        res.detections,
+        key=lambda d: d.location_data.relative_bounding_box.width
+        * d.location_data.relative_bounding_box.height,
+    )
+    box = det.location_data.relative_bounding_box
+    return box.xmin, box.ymin, box.width, box.height
 
 
 def find_face_square(
-    pil_img: Image.Image,
+    rgb: np.ndarray,             # H×W×3 uint8, RGB order
     side_max: int,
     pad_px: int = 300,           # ← adjust this for more/less breathing room
 ) -> Tuple[int, int, int, int] | None:
-    img_bgr = cv2.cvtColor(np.asarray(pil_img), cv2.COLOR_RGB2BGR)
-    h, w = img_bgr.shape[:2]
+    h, w = rgb.shape[:2]
 
-    with _mp_fd.FaceDetection(model_selection=1, min_detection_confidence=0.4) as fd:
-        res = fd.process(img_bgr[:, :, ::-1])  # MediaPipe expects RGB
-        if not res.detections:
-            return None
+    # downscale + letterbox into a DETECT_W×DETECT_H buffer
+    scale = min(1.0, DETECT_W / w, DETECT_H / h)
+    if scale < 1:
+        rgb = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    sh, sw = rgb.shape[:2]
+    top, left = (DETECT_H - sh) // 2, (DETECT_W - sw) // 2
+    buf = cv2.copyMakeBorder(
+        rgb, top, DETECT_H - sh - top, left, DETECT_W - sw - left,
+        cv2.BORDER_CONSTANT, value=0,
+    )
+
+    with _fd_lock:
+        box = _largest_face(buf)
+    if box is None:
+        return None
+
+    # undo letterbox: buffer-relative → original pixels
+    x0 = int((box[0] * DETECT_W - left) / scale)
+    y0 = int((box[1] * DETECT_H - top) / scale)
+    bw = int(box[2] * DETECT_W / scale)
+    bh = int(box[3] * DETECT_H / scale)
+
+    # base square side = max face dimension + padding*2
+    side = max(bw, bh) + 2 * pad_px
+    side = min(side, side_max, w, h)      # never exceed limits
+
+    # center square on the face
+    cx = x0 + bw // 2
+    cy = y0 + bh // 2
+    x0 = max(0, cx - side // 2)
+    y0 = max(0, cy - side // 2)
+    x1 = min(w, x0 + side)
+    y1 = min(h, y0 + side)
+
+    # if clamped, re-square by shifting the opposite edge
+    x0, y0 = x1 - side, y1 - side
 
-        # largest face by box area
-        det = max(
-            res.detections,
-            key=lambda d: d.location_data.relative_bounding_box.width
-            * d.location_data.relative_bounding_box.height,
-        )
-        box = det.location_data.relative_bounding_box
-        x0 = int(box.xmin * w)
-        y0 = int(box.ymin * h)
-        bw = int(box.width * w)
-        bh = int(box.height * h)
-
-        # base square side = max face dimension + padding*2
-        side = max(bw, bh) + 2 * pad_px
-        side = min(side, side_max, w, h)      # never exceed limits
-
-        # center square on the face
-        cx = x0 + bw // 2
-        cy = y0 + bh // 2
-        x0 = max(0, cx - side // 2)
-        y0 = max(0, cy - side // 2)
-        x1 = min(w, x0 + side)
-        y1 = min(h, y0 + side)
-
-        # if clamped, re-square by shifting the opposite edge
-        x0, y0 = x1 - side, y1 - side
-
-        return (x0, y0, x1, y1)
+    return (x0, y0, x1, y1)
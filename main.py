@@ -5,21 +5,33 @@ LoRA-dataset prep GUI
 • Full-image preview (Tkinter Canvas)
 • Square crop: draggable inside, resizable by corner handles
 • Stops at image edge, always square
-• Saved PNG is resampled to `crop_size` (settings.yaml)
+• Saved crop is resampled to `crop_size`, written as PNG / WebP / JPEG (settings.yaml)
 • Keys: ← → browse | Enter save | s skip
 """
 
 # ── stdlib / deps ───────────────────────────────────────────────────────────
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import hashlib
+import json
+import os
+import queue
 import sys
+import threading
+import cv2                 # pip install opencv-python
+import numpy as np
 import yaml                # pip install pyyaml
-from PIL import Image, ImageTk  # pip install pillow
+try:                       # libyaml-backed parser when available
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+from PIL import Image, ImageTk  # pip install pillow  (or: CC="cc -mavx2" pip install pillow-simd)
 import tkinter as tk
 from tkinter import messagebox
 
 
-from face_crop import find_face_square
-from captioner import caption
+from face_crop import BACKEND as FACE_BACKEND, find_face_square
+from captioner import caption, caption_batch, _load_model
 
 # ── settings ───────────────────────────────────────────────────────────────
 CFG_FILE = "settings.yaml"
@@ -28,24 +40,91 @@ DEFAULTS = dict(
     output_folder="./output",
     crop_size=512,
     global_tags="photo of jonathanzxyz",
+    resample="AUTO",
+    save_format="png",
+    save_quality=95,
 )
+RESAMPLE = {  # settings name -> OpenCV interpolation for the saved crop
+    # AUTO: area filter when shrinking, Lanczos when enlarging
+    # (INTER_AREA degrades to ~nearest-neighbour on upscale)
+    "AUTO": None,
+    "NEAREST": cv2.INTER_NEAREST,
+    "BILINEAR": cv2.INTER_LINEAR,
+    "BICUBIC": cv2.INTER_CUBIC,
+    "LANCZOS": cv2.INTER_LANCZOS4,
+    "AREA": cv2.INTER_AREA,
+}
+SAVE_FORMATS = ("png", "webp", "jpg")
+PREFETCH = 4  # images captioned ahead of the current one, in one batch
 
 
 def load_cfg():
     cfg = DEFAULTS.copy()
     if Path(CFG_FILE).is_file():
-        cfg.update(yaml.safe_load(Path(CFG_FILE).read_text()) or {})
+        cfg.update(yaml.load(Path(CFG_FILE).read_text(), Loader=_YamlLoader) or {})
     cfg["input_folder"] = str(Path(cfg["input_folder"]).expanduser())
     cfg["output_folder"] = str(Path(cfg["output_folder"]).expanduser())
+
+    # fail at startup, not at the first save
+    cfg["resample"] = str(cfg["resample"]).upper()
+    if cfg["resample"] not in RESAMPLE:
+        raise ValueError(
+            f"{CFG_FILE}: unknown resample {cfg['resample']!r}, "
+            f"expected one of {', '.join(RESAMPLE)}"
+        )
+    cfg["save_format"] = str(cfg["save_format"]).lower().replace("jpeg", "jpg")
+    if cfg["save_format"] not in SAVE_FORMATS:
+        raise ValueError(
+            f"{CFG_FILE}: unknown save_format {cfg['save_format']!r}, "
+            f"expected one of {', '.join(SAVE_FORMATS)}"
+        )
     return cfg
 
 
-CFG = load_cfg()
+CFG = {}  # filled by main(); importing this module does no disk I/O
 
 
 def list_images(folder):
-    exts = {".jpg", ".jpeg", ".png"}
-    return sorted([p for p in Path(folder).iterdir() if p.suffix.lower() in exts])
+    exts = (".jpg", ".jpeg", ".png")
+    with os.scandir(folder) as it:
+        return sorted(
+            (
+                Path(e.path)
+                for e in it
+                if e.is_file(follow_symlinks=False) and e.name.lower().endswith(exts)
+            ),
+            key=lambda p: p.name,
+        )
+
+
+# ── sidecar cache (face box + caption per source image) ──────────────────
+CACHE_VERSION = 2  # bump when detector / caption pipeline output changes
+_cache_lock = threading.Lock()
+
+
+def _cache_file(path):
+    st = path.stat()  # name + mtime + size: no need to hash the pixels
+    key = hashlib.blake2b(
+        f"v{CACHE_VERSION}:{FACE_BACKEND}:{path.name}:{st.st_mtime_ns}:{st.st_size}".encode(),
+        digest_size=16,
+    ).hexdigest()
+    return Path(CFG["output_folder"]) / ".cache" / f"{key}.json"
+
+
+def cache_get(path):
+    try:
+        return json.loads(_cache_file(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def cache_put(path, **fields):
+    with _cache_lock:
+        entry = cache_get(path)
+        entry.update(fields)
+        f = _cache_file(path)
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(json.dumps(entry), encoding="utf-8")
 
 
 # ── CropBox helper ─────────────────────────────────────────────────────────
@@ -55,13 +134,18 @@ class CropBox:
     def __init__(self, canvas, img_w, img_h, scale):
         self.cv = canvas
         self.iw, self.ih, self.s = img_w, img_h, scale
+        self.inv_s = 1.0 / scale
+        self.smax = min(img_w, img_h)   # largest square that fits
         side = min(CFG["crop_size"], img_w, img_h)
         pad_x = (img_w - side) // 2
         pad_y = (img_h - side) // 2
         self.box = [pad_x, pad_y, pad_x + side, pad_y + side]  # xyxy in orig px
         self.drag_mode = None  # "move" or handle idx 0-3
+        self.touched = False   # user grabbed the box at least once
         self.start_xy = (0, 0)
         self.start_box = self.box.copy()
+        self._pending_redraw = False
+        self._create_items()
         self.redraw()
 
         # one-time canvas-wide events
@@ -70,32 +154,36 @@ class CropBox:
         self.cv.bind("<ButtonRelease-1>", lambda _e: setattr(self, "drag_mode", None))
 
     # ── draw / redraw ────────────────────────────────────────────────────
-    def redraw(self):
-        self.cv.delete("crop")
-        x0, y0, x1, y1 = [c * self.s for c in self.box]
-        # main rectangle
-        self.cv.create_rectangle(
-            x0,
-            y0,
-            x1,
-            y1,
-            outline="lime",
-            width=2,
-            tags="crop",
+    def _create_items(self):
+        # items are created once; redraws only move them
+        self.rect_id = self.cv.create_rectangle(
+            0, 0, 0, 0, outline="lime", width=2, tags="crop"
         )
-        # handles
-        self.handles = []
-        for hx, hy in [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]:
-            hid = self.cv.create_rectangle(
-                hx - self.HANDLE_R,
-                hy - self.HANDLE_R,
-                hx + self.HANDLE_R,
-                hy + self.HANDLE_R,
-                fill="lime",
-                outline="black",
-                tags="crop",
+        self.handles = [
+            self.cv.create_rectangle(
+                0, 0, 0, 0, fill="lime", outline="black", tags="crop"
             )
-            self.handles.append(hid)
+            for _ in range(4)
+        ]
+
+    def redraw(self):
+        # coalesce bursts of <B1-Motion> into one redraw per idle cycle
+        if not self._pending_redraw:
+            self._pending_redraw = True
+            self.cv.after_idle(self._do_redraw)
+
+    def _do_redraw(self):
+        self._pending_redraw = False
+        bx0, by0, bx1, by1 = self.box
+        s = self.s
+        x0, y0, x1, y1 = bx0 * s, by0 * s, bx1 * s, by1 * s
+        r = self.HANDLE_R
+        coords, h = self.cv.coords, self.handles
+        coords(self.rect_id, x0, y0, x1, y1)
+        coords(h[0], x0 - r, y0 - r, x0 + r, y0 + r)
+        coords(h[1], x1 - r, y0 - r, x1 + r, y0 + r)
+        coords(h[2], x1 - r, y1 - r, x1 + r, y1 + r)
+        coords(h[3], x0 - r, y1 - r, x0 + r, y1 + r)
 
     # ── event helpers ───────────────────────────────────────────────────
     def on_press(self, ev):
@@ -107,67 +195,73 @@ class CropBox:
             x0, y0, x1, y1 = self.cv.coords(hid)
             if x0 <= ev.x <= x1 and y0 <= ev.y <= y1:
                 self.drag_mode = i  # handle index
+                self.touched = True
                 return
         # else inside rect? -> move
-        rx0, ry0, rx1, ry1 = [c * self.s for c in self.box]
-        if rx0 <= ev.x <= rx1 and ry0 <= ev.y <= ry1:
+        bx0, by0, bx1, by1 = self.box
+        s = self.s
+        if bx0 * s <= ev.x <= bx1 * s and by0 * s <= ev.y <= by1 * s:
             self.drag_mode = "move"
+            self.touched = True
 
     def on_drag(self, ev):
-        if self.drag_mode is None:
+        mode = self.drag_mode
+        if mode is None:
             return
-        dx = (ev.x - self.start_xy[0]) / self.s
-        dy = (ev.y - self.start_xy[1]) / self.s
-        b = self.start_box.copy()
+        sx0, sy0 = self.start_xy
+        dx = int((ev.x - sx0) * self.inv_s)   # box stays in int orig px
+        dy = int((ev.y - sy0) * self.inv_s)
 
-        if self.drag_mode == "move":
-            b = [b[0] + dx, b[1] + dy, b[2] + dx, b[3] + dy]
-            b = self._clamp_move(b)
+        if mode == "move":
+            self._clamp_move(dx, dy)
         else:
-            b = self._resize(b, dx, dy, self.drag_mode)
-        self.box = b
+            self._resize(dx, dy, mode)
         self.redraw()
 
-    # ── math -------------------------------------------------------------
-    def _clamp_move(self, b):
-        side = b[2] - b[0]
-        x0 = max(0, min(b[0], self.iw - side))
-        y0 = max(0, min(b[1], self.ih - side))
-        return [x0, y0, x0 + side, y0 + side]
-
-    def _resize(self, b, dx, dy, idx):
-        delta = max(dx, dy, key=abs)
+    # ── math (hot path: runs per motion event, writes self.box in place) ──
+    def _clamp_move(self, dx, dy):
+        b0, b1, b2, _ = self.start_box
+        side = b2 - b0
+        x0, y0 = b0 + dx, b1 + dy
+        xmax, ymax = self.iw - side, self.ih - side
+        x0 = 0 if x0 < 0 else (xmax if x0 > xmax else x0)
+        y0 = 0 if y0 < 0 else (ymax if y0 > ymax else y0)
+        b = self.box
+        b[0], b[1], b[2], b[3] = x0, y0, x0 + side, y0 + side
+
+    def _resize(self, dx, dy, idx):
+        delta = dx if dx * dx >= dy * dy else dy
+        b0, b1, b2, _ = self.start_box
         if idx == 0:  # TL
-            b[0] += delta
-            b[1] += delta
+            b0 += delta
+            b1 += delta
         elif idx == 1:  # TR
-            b[2] += delta
-            b[1] -= delta
+            b2 += delta
+            b1 -= delta
         elif idx == 2:  # BR
-            b[2] += delta
-            b[3] += delta
-        elif idx == 3:  # BL
-            b[0] -= delta
-            b[3] += delta
+            b2 += delta
+        else:  # BL
+            b0 -= delta
 
         # enforce square + bounds
-        side = b[2] - b[0]
-        side = max(10, side)
-        if b[0] < 0:
-            b[0], b[2] = 0, side
-        if b[1] < 0:
-            b[1], b[3] = 0, side
-        if b[2] > self.iw:
-            b[2], b[0] = self.iw, self.iw - side
-        if b[3] > self.ih:
-            b[3], b[1] = self.ih, self.ih - side
-        b[2] = b[0] + side
-        b[3] = b[1] + side
-        return b
+        side = b2 - b0
+        if side < 10:
+            side = 10
+        if side > self.smax:
+            side = self.smax
+        x0 = 0 if b0 < 0 else (self.iw - side if b0 + side > self.iw else b0)
+        y0 = 0 if b1 < 0 else (self.ih - side if b1 + side > self.ih else b1)
+        b = self.box
+        b[0], b[1], b[2], b[3] = x0, y0, x0 + side, y0 + side
 
     # public
     def get_box(self):
-        return tuple(map(int, self.box))
+        # always inside the image: save_img slices, and numpy wraps negatives
+        x0, y0, x1, _ = map(int, self.box)
+        side = min(x1 - x0, self.smax)
+        x0 = min(max(0, x0), self.iw - side)
+        y0 = min(max(0, y0), self.ih - side)
+        return (x0, y0, x0 + side, y0 + side)
 
 
 # ── Main application ───────────────────────────────────────────────────────
@@ -184,6 +278,18 @@ class App(tk.Tk):
             return
         self.idx = 0
 
+        # warm BLIP up while the first image / face-crop is shown
+        threading.Thread(target=_load_model, daemon=True).start()
+        self._pool = ThreadPoolExecutor(max_workers=1)       # foreground caption
+        self._face_pool = ThreadPoolExecutor(max_workers=1)  # never waits on BLIP
+        self._futures = []                  # current image's jobs
+        self._caption_cache = {}            # idx -> BLIP caption
+        self._prefetch_q = queue.Queue()
+        self._inflight = set()              # idxs in the running prefetch batch
+        self._fg_idxs = set()               # idxs queued/running in the foreground
+        self._fg_cond = threading.Condition()
+        threading.Thread(target=self._prefetch_worker, daemon=True).start()
+
         self.saved = set()             #  <-- NEW  (indices of images you've saved)
 
         self.canvas = tk.Canvas(self, bg="black")
@@ -194,6 +300,10 @@ class App(tk.Tk):
 
         tk.Label(bottom, text="Caption:").pack(side=tk.LEFT, padx=4)
         self.caption = tk.StringVar()
+        self._caption_pending = False   # BLIP still running for this image
+        self._caption_dirty = False     # user typed in the entry
+        self._filling_caption = False
+        self.caption.trace_add("write", self._on_caption_edit)
         tk.Entry(bottom, textvariable=self.caption, width=70).pack(
             side=tk.LEFT, fill=tk.X, expand=True
         )
@@ -219,51 +329,231 @@ class App(tk.Tk):
 
     # ── image cycle ────────────────────────────────────────────────────
     def load_img(self):
+        for fut in self._futures:  # drop queued jobs for the image we left
+            fut.cancel()
+        self._futures = []
+        self._cap_fut = None
+
         path = self.img_paths[self.idx]
         self.orig = Image.open(path).convert("RGB")
+        self.rgb = np.asarray(self.orig)  # one copy, shared by face detect, BLIP, save
 
-        # ── auto-face crop ──────────────────────────────────────────────
-        side_limit = min(self.orig.width, self.orig.height)   # ← NEW: allow big squares
-        face_box   = find_face_square(self.orig, side_limit)  #    (was CFG["crop_size"])
-        self.initial_face_box = face_box                      # None if no face found
+        cached = cache_get(path)
+        self.initial_face_box = None                          # None if no face found
 
         # ── fit to window ───────────────────────────────────────────────
         self.update_idletasks()
         max_w = self.canvas.winfo_width() - 20 or 1000
         max_h = self.canvas.winfo_height() - 20 or 700
         scale = min(max_w / self.orig.width, max_h / self.orig.height, 1)
-        disp  = self.orig.resize(
-            (int(self.orig.width * scale), int(self.orig.height * scale))
+        disp  = self.orig.resize(             # preview only: cheap filter
+            (int(self.orig.width * scale), int(self.orig.height * scale)),
+            Image.BILINEAR,
+            reducing_gap=2.0,
         )
-        self.photo = ImageTk.PhotoImage(disp)
+        if self.photo is not None and (self.photo.width(), self.photo.height()) == disp.size:
+            self.photo.paste(disp)   # same size: blit into the existing Tk photo
+        else:
+            self.photo = ImageTk.PhotoImage(disp)
         self.canvas.delete("all")
         self.canvas.create_image(10, 10, anchor=tk.NW, image=self.photo, tags="img")
 
-        # ── cropper ─────────────────────────────────────────────────────
+        # ── cropper (centred; snaps to the face once detected) ──────────
         self.cropper = CropBox(self.canvas, self.orig.width, self.orig.height, scale)
-        if self.initial_face_box:
-            self.cropper.box = list(self.initial_face_box)
+        if "face_box" in cached:
+            self._set_face_box(self.idx, cached["face_box"])
+        else:
+            side_limit = min(self.orig.width, self.orig.height)   # ← NEW: allow big squares
+            idx = self.idx
+            fut = self._face_pool.submit(self._face_worker, idx, self.rgb, side_limit)
+            self._futures.append(fut)
+            fut.add_done_callback(
+                lambda f: f.cancelled() or self._post(self._face_done, idx, f)
+            )
+
+        # ── caption (cached / background) ───────────────────────────────
+        self._caption_dirty = False
+        ph = self._caption_cache.get(self.idx, cached.get("caption"))
+        if ph is not None:
+            self._caption_cache[self.idx] = ph
+            self._caption_pending = False
+            self._set_caption(self.idx, ph)
+        else:
+            self._caption_pending = True
+            self._fill_caption("...")
+            with self._fg_cond:
+                in_batch = self.idx in self._inflight
+            if not in_batch:  # else the prefetcher posts it
+                self._submit_caption()
+        self._prefetch()
+
+        self.title(f"[{self.idx+1}/{len(self.img_paths)}] – {path.name}")
+
+    def _face_worker(self, idx, rgb, side_limit):
+        face_box = find_face_square(rgb, side_limit)
+        cache_put(self.img_paths[idx], face_box=face_box)
+        return face_box
+
+    def _face_done(self, idx, fut):
+        err = fut.exception()
+        if err is None:
+            self._set_face_box(idx, fut.result())
+        else:  # keep the centred box; the user can still crop by hand
+            print(f"face detection failed: {err!r}", file=sys.stderr)
+
+    def _set_face_box(self, idx, face_box):
+        if idx != self.idx:
+            return
+        self.initial_face_box = face_box
+        if face_box and not self.cropper.touched:  # keep the user's own box
+            self.cropper.box = list(face_box)
             self.cropper.redraw()
 
-        # ── caption ─────────────────────────────────────────────────────
-        
-        ph    = caption(self.orig)
+    def destroy(self):
+        for name in ("_pool", "_face_pool"):
+            pool = getattr(self, name, None)
+            if pool is not None:  # don't let queued jobs hold up exit
+                pool.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def _submit_caption(self):
+        idx = self.idx
+        with self._fg_cond:  # prefetcher must neither take nor jump ahead of it
+            self._fg_idxs.add(idx)
+        fut = self._cap_fut = self._pool.submit(self._caption_worker, idx, self.rgb)
+        self._futures.append(fut)
+        fut.add_done_callback(lambda f: self._fg_release(idx))
+        fut.add_done_callback(
+            lambda f: f.cancelled() or self._post(self._caption_done, idx, f)
+        )
+
+    def _fg_release(self, idx):
+        with self._fg_cond:
+            self._fg_idxs.discard(idx)
+            self._fg_cond.notify_all()
+
+    def _caption_worker(self, idx, img):
+        ph = self._caption_cache.get(idx)
+        if ph is not None:  # a prefetch batch got there while we were queued
+            return ph
+        ph = caption(img)
+        self._caption_cache[idx] = ph
+        cache_put(self.img_paths[idx], caption=ph)
+        return ph
+
+    def _post(self, fn, *args):
+        # runs on a worker thread: hand the result to the Tk loop
+        try:
+            self.after(0, fn, *args)
+        except (RuntimeError, tk.TclError):  # window already destroyed
+            pass
+
+    def _caption_done(self, idx, fut):
+        err = fut.exception()
+        if err is None:
+            self._set_caption(idx, fut.result())
+            return
+        print(f"caption failed: {err!r}", file=sys.stderr)
+        if idx == self.idx:
+            self._caption_pending = False
+            if not self._caption_dirty:
+                self._fill_caption("")
+            messagebox.showerror("Caption failed", f"BLIP could not caption this image:\n{err}")
+
+    # ── caption look-ahead ─────────────────────────────────────────────
+    def _prefetch(self):
+        last = min(self.idx + PREFETCH, len(self.img_paths) - 1)
+        for i in range(self.idx + 1, last + 1):
+            if i not in self._caption_cache and i not in self._inflight:
+                self._prefetch_q.put(i)
+
+    def _prefetch_worker(self):
+        while True:
+            idxs = [self._prefetch_q.get()]
+            while len(idxs) < PREFETCH:
+                try:
+                    idxs.append(self._prefetch_q.get_nowait())
+                except queue.Empty:
+                    break
+            idxs = [i for i in dict.fromkeys(idxs) if i not in self._caption_cache]
+            todo = []
+            try:
+                for i in idxs:
+                    ph = cache_get(self.img_paths[i]).get("caption")
+                    if ph is None:
+                        todo.append(i)
+                    else:
+                        self._caption_cache[i] = ph
+                with self._fg_cond:  # skip what the foreground already owns
+                    todo = [i for i in todo if i not in self._fg_idxs]
+                    self._inflight.update(todo)
+                if not todo:
+                    continue
+                imgs = [Image.open(self.img_paths[i]).convert("RGB") for i in todo]
+                with self._fg_cond:  # the image on screen goes first
+                    self._fg_cond.wait_for(lambda: not self._fg_idxs)
+                for i, ph in zip(todo, caption_batch(imgs)):
+                    self._caption_cache[i] = ph
+                    cache_put(self.img_paths[i], caption=ph)
+                    self._post(self._set_caption, i, ph)  # no-op unless on screen
+            except Exception as e:  # a bad file must not kill the prefetcher
+                print(f"caption prefetch failed: {e}", file=sys.stderr)
+                self._post(self._prefetch_failed, todo)
+            finally:
+                with self._fg_cond:
+                    self._inflight.difference_update(todo)
+
+    def _prefetch_failed(self, idxs):
+        # the on-screen image was left to this batch: caption it directly
+        if self.idx in idxs and self._caption_pending and self._cap_fut is None:
+            self._submit_caption()
+
+    def _set_caption(self, idx, ph):
+        if idx != self.idx:  # user already moved on
+            return
+        self._caption_pending = False
+        if self._caption_dirty:  # never clobber what the user typed
+            return
         gtags = CFG["global_tags"]
-        self.caption.set(f"{gtags}, {ph}" if gtags else ph)
+        self._fill_caption(f"{gtags}, {ph}" if gtags else ph)
 
-        self.title(f"[{self.idx+1}/{len(self.img_paths)}] – {path.name}")
+    def _fill_caption(self, text):
+        self._filling_caption = True
+        try:
+            self.caption.set(text)
+        finally:
+            self._filling_caption = False
 
+    def _on_caption_edit(self, *_):
+        if not self._filling_caption:
+            self._caption_dirty = True
 
     # ── actions ────────────────────────────────────────────────────────
     def save_img(self):
-        box = self.cropper.get_box()
-        crop = (
-            self.orig.crop(box)
-            .resize((CFG["crop_size"], CFG["crop_size"]), Image.LANCZOS)
-        )
+        if self._caption_pending and not self._caption_dirty:
+            messagebox.showinfo(
+                "Caption pending",
+                "BLIP is still captioning this image.\n"
+                "Wait a moment or type a caption yourself.",
+            )
+            return
+        x0, y0, x1, y1 = self.cropper.get_box()
+        # slice of self.rgb (which np.asarray copied once in load_img): no extra copy
+        arr = self.rgb[y0:y1, x0:x1]
+        interp = RESAMPLE[CFG["resample"]]
+        if interp is None:
+            interp = cv2.INTER_AREA if x1 - x0 > CFG["crop_size"] else cv2.INTER_LANCZOS4
+        small = cv2.resize(arr, (CFG["crop_size"], CFG["crop_size"]), interpolation=interp)
         stem = self.img_paths[self.idx].stem
         out_dir = Path(CFG["output_folder"])
-        crop.save(out_dir / f"{stem}.png")
+        fmt = CFG["save_format"]  # validated in load_cfg
+        if fmt == "webp":
+            opts = dict(format="WEBP", quality=CFG["save_quality"], method=4)
+        elif fmt == "jpg":
+            opts = dict(format="JPEG", quality=CFG["save_quality"], progressive=True)
+        else:
+            opts = dict(format="PNG", optimize=False, compress_level=1)
+        Image.fromarray(small).save(out_dir / f"{stem}.{fmt}", **opts)
 
         text = self.caption.get().strip()
         if CFG["global_tags"] and CFG["global_tags"] not in text:
@@ -299,8 +589,13 @@ class App(tk.Tk):
 
 
 # ── run ───────────────────────────────────────────────────────────────────
-if __name__ == "__main__":
+def main():
+    CFG.update(load_cfg())
     try:
         App().mainloop()
     except KeyboardInterrupt:
         pass
+
+
+if __name__ == "__main__":
+    main()